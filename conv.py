@@ -1,7 +1,17 @@
 #!/usr/bin/env python3
+import mmap
 import sys
+from array import array
+from collections import Counter
 from pathlib import Path
 
+# Optional compiled parser (cythonize -i conv_parse.pyx). The pure-Python
+# parse_resp below stays as the fallback (and for PyPy).
+try:
+    from conv_parse import parse_resp as _parse_resp_c
+except ImportError:
+    _parse_resp_c = None
+
 # ---------------- CONFIG ----------------
 MAX_REPEAT_BLOCKS = 2
 MIN_BLOCK = 3
@@ -81,19 +91,30 @@ def parse_resp(data: bytes):
             yield argv
 '''
 
+# 256-entry whitespace table: one indexed load per byte instead of a
+# three-way compare chain in the skip loop.
+_WS_TABLE = bytes(1 if i in (0x20, 0x0D, 0x0A) else 0 for i in range(256))
+
 def parse_resp(data: bytes):
+    # Indexing bytes gives plain ints, so all the single-byte checks below
+    # are integer compares instead of allocating a fresh 1-byte slice per
+    # probe. Slices are only taken for the int() fields and the final arg.
     i = 0
     n = len(data)
+    find = data.find
+    ws = _WS_TABLE
 
     while i < n:
+        b = data[i]
+
         # Skip whitespace
-        if data[i:i+1] in b" \r\n":
+        if ws[b]:
             i += 1
             continue
 
         # Skip inline commands (e.g. PING\r\n)
-        if data[i:i+1] not in (b'*',):
-            end = data.find(b'\r\n', i)
+        if b != 0x2A:  # '*'
+            end = find(b'\r\n', i)
             if end == -1:
                 return
             i = end + 2
@@ -102,15 +123,19 @@ def parse_resp(data: bytes):
         # We saw '*', try to parse argc
         star = i
         i += 1
-        end = data.find(b'\r\n', i)
+        end = find(b'\r\n', i)
         if end == -1:
             return
 
         try:
             argc = int(data[i:end])
         except ValueError:
-            # Not a valid array header → resync
-            i = star + 1
+            # Not a valid array header → resync at the next line that
+            # starts a frame. Stepping back to star+1 re-ran the CRLF
+            # scan from every off-by-one position, which goes quadratic
+            # on adversarial garbage.
+            p = find(b'\n*', star)
+            i = p + 1 if p != -1 else n
             continue
 
         i = end + 2
@@ -118,12 +143,12 @@ def parse_resp(data: bytes):
         ok = True
 
         for _ in range(argc):
-            if i >= n or data[i:i+1] != b'$':
+            if i >= n or data[i] != 0x24:  # '$'
                 ok = False
                 break
 
             i += 1
-            end = data.find(b'\r\n', i)
+            end = find(b'\r\n', i)
             if end == -1:
                 return
 
@@ -145,66 +170,166 @@ def parse_resp(data: bytes):
             yield argv
         # else: silently drop malformed command
 
+# ASCII-only lowercase table: translate() is a straight per-byte table
+# walk, cheaper than bytes.lower() and exactly right for opcode bytes.
+_LC = bytes.maketrans(bytes(range(0x41, 0x5B)), bytes(range(0x61, 0x7B)))
+
+# Intern lowered opcodes: identical raw spellings share one bytes object,
+# so repeated commands skip the .lower() allocation and downstream
+# comparisons can short-circuit on identity.
+_OP_CACHE = {}
+
 def opcode(argv):
-    return argv[0].lower()
+    k = argv[0]
+    v = _OP_CACHE.get(k)
+    if v is None:
+        v = _OP_CACHE[k] = k.translate(_LC)
+    return v
 
-def truncate_arg(a: bytes):
-    return a if len(a) <= MAX_ARG_LEN else a[:MAX_ARG_LEN] + b"..."
+_ELLIPSIS = b"..."
 
-def shrink_command(argv):
-    op = opcode(argv)
+def truncate_arg(a: bytes):
+    return a if len(a) <= MAX_ARG_LEN else a[:MAX_ARG_LEN] + _ELLIPSIS
 
+def _shrink_geoadd(argv):
     # GEOADD key lon lat member ...
-    if op == b"geoadd" and len(argv) > 5:
+    if len(argv) > 5:
         key = argv[1:2]
         triples = argv[2:]
         triples = triples[: MAX_GEOADD_TRIPLES * 3]
         argv = [argv[0]] + key + triples
+    return argv
+
+# Per-opcode shrinkers: one hash lookup instead of a chain of bytes
+# compares as more commands grow special cases.
+_SHRINKERS = {
+    b"geoadd": _shrink_geoadd,
+}
+
+def shrink_command(argv):
+    fn = _SHRINKERS.get(opcode(argv))
+    if fn is not None:
+        argv = fn(argv)
 
     # Hard cap total args
     argv = argv[:MAX_ARGS_TOTAL]
 
-    return [truncate_arg(a) for a in argv]
+    # Inline truncate_arg: compute all lengths in one C-level map() pass
+    # and keep short args (the common case) untouched.
+    m = MAX_ARG_LEN
+    return [a if L <= m else a[:m] + _ELLIPSIS
+            for a, L in zip(argv, map(len, argv))]
 
 def collapse_blocks(cmds):
-    ops = [opcode(c) for c in cmds]
-    out = []
+    # Generator: commands stream straight into the writer instead of
+    # being gathered into a second full-size output list.
+    min_block = MIN_BLOCK
+    max_block = MAX_BLOCK
+    max_repeat = MAX_REPEAT_BLOCKS
+
+    # Drain the parse generator and integer-encode the lowercase opcodes
+    # in the same pass, so the command stream is walked once instead of
+    # list() followed by a second id-encoding loop. (The run detector
+    # below needs the complete opcode sequence up front, so commands do
+    # have to be materialized.) Small ints compare cheaper than bytes,
+    # and the raw-spelling cache means each distinct spelling pays for
+    # .lower() exactly once.
+    low_ids = {}
+    raw_ids = {}
+    ids = array("I")
+    id_append = ids.append
+    src = cmds
+    cmds = []
+    cmd_append = cmds.append
+    for c in src:
+        cmd_append(c)
+        k = c[0]
+        v = raw_ids.get(k)
+        if v is None:
+            low = k.translate(_LC)
+            v = low_ids.get(low)
+            if v is None:
+                v = low_ids[low] = len(low_ids)
+            raw_ids[k] = v
+        id_append(v)
+    n = len(cmds)
+
+    # Fast paths: too short to hold a collapsible run, or no opcode
+    # occurs often enough to fill MAX_REPEAT_BLOCKS+1 blocks (every
+    # opcode in a run repeats once per block). Skips the match-array
+    # setup entirely for typical small or repetition-free inputs.
+    if n < min_block * (max_repeat + 1):
+        yield from cmds
+        return
+    if Counter(ids).most_common(1)[0][1] < max_repeat + 1:
+        yield from cmds
+        return
+
+    # match[s][i] = number of consecutive positions j >= i with
+    # ids[j] == ids[j + s], filled right-to-left in O(n) per stride.
+    # A period-s run starting at i then spans 1 + match[s][i] // s full
+    # blocks, so the old O(size * reps) slice comparisons per position
+    # become a single O(1) lookup. (A plain Z-array is anchored to the
+    # string prefix and can't answer suffix-vs-suffix matches, hence the
+    # per-stride arrays.)
+    match = {}
+    zeros = array("I", bytes(4 * n))
+    for s in range(min_block, max_block + 1):
+        m = zeros[:]
+        for j in range(n - s - 1, -1, -1):
+            if ids[j] == ids[j + s]:
+                m[j] = m[j + 1] + 1
+        match[s] = m
+
     i = 0
 
-    while i < len(cmds):
+    while i < n:
         collapsed = False
 
-        for size in range(MIN_BLOCK, MAX_BLOCK + 1):
-            block = ops[i:i+size]
-            if len(block) < size:
-                continue
+        for size in range(min_block, max_block + 1):
+            if i + size > n:
+                break  # larger sizes won't fit either
 
-            reps = 1
-            while ops[i + reps*size : i + (reps+1)*size] == block:
-                reps += 1
+            reps = 1 + match[size][i] // size
 
-            if reps > MAX_REPEAT_BLOCKS:
-                for r in range(MAX_REPEAT_BLOCKS):
-                    for j in range(size):
-                        out.append(cmds[i + r*size + j])
+            if reps > max_repeat:
+                yield from cmds[i : i + max_repeat * size]
                 i += reps * size
                 collapsed = True
                 break
 
         if not collapsed:
-            out.append(cmds[i])
+            yield cmds[i]
             i += 1
 
-    return out
-
 def convert(inp: Path, outp: Path):
-    cmds = list(parse_resp(inp.read_bytes()))
-    cmds = collapse_blocks(cmds)
+    parser = _parse_resp_c if _parse_resp_c is not None else parse_resp
 
-    with outp.open("wb") as f:
-        for c in cmds:
-            c = shrink_command(c)
-            f.write(b" ".join(c) + b"\n")
+    # mmap instead of read_bytes(): the parser walks the page cache
+    # directly rather than a full in-memory copy of the corpus. mmap
+    # supports the same int indexing / .find / slicing the parser uses,
+    # and arg slices are real bytes copies so they outlive the map.
+    with inp.open("rb") as fh:
+        try:
+            mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            mm = None  # empty file can't be mapped
+
+        try:
+            data = mm if mm is not None else b""
+            # Accumulate all lines and write once instead of one small
+            # write per command; b"\n" is a shared constant so the second
+            # append is free.
+            chunks = []
+            for c in collapse_blocks(parser(data)):
+                c = shrink_command(c)
+                chunks.append(b" ".join(c))
+                chunks.append(b"\n")
+        finally:
+            if mm is not None:
+                mm.close()
+
+    outp.write_bytes(b"".join(chunks))
 
 if __name__ == "__main__":
     if len(sys.argv) != 3:
@@ -0,0 +1,148 @@
+# cython: language_level=3, boundscheck=False, wraparound=False
+"""
+Cython port of the lenient RESP parser in conv.py.
+
+Walks the buffer with C integer arithmetic instead of per-byte bytes slices.
+Build with:
+
+    cythonize -i conv_parse.pyx
+
+conv.py falls back to the pure-Python parse_resp when this module is not
+compiled, so the extension is strictly optional.
+"""
+
+
+def parse_resp(const unsigned char[::1] data, bint strict=False):
+    """Return a list of argv lists (list of bytes). Same semantics as the
+    Python parse_resp: skip whitespace, skip inline commands, resync on a
+    bad array header, silently drop malformed or truncated commands. With
+    strict=True, raise ValueError on any of those instead (oldconv.py
+    semantics): whitespace, truncation and empty length fields all fail
+    loudly rather than producing partial output."""
+    cdef Py_ssize_t i = 0, n = data.shape[0]
+    cdef Py_ssize_t star, end, j
+    cdef Py_ssize_t argc, length, k
+    cdef long long v
+    cdef unsigned char c
+    cdef bint ok, neg
+    cdef list out = []
+    cdef list argv
+
+    while i < n:
+        c = data[i]
+        if c == 0x20 or c == 0x0D or c == 0x0A:  # whitespace
+            if strict:
+                # oldconv raises on any non-'*' byte, whitespace included
+                raise ValueError("Expected '*' at %d" % i)
+            i += 1
+            continue
+
+        if c != 0x2A:  # not '*': inline command, skip the line
+            if strict:
+                raise ValueError("Expected '*' at %d" % i)
+            j = i
+            while j + 1 < n and not (data[j] == 0x0D and data[j + 1] == 0x0A):
+                j += 1
+            if j + 1 >= n:
+                return out
+            i = j + 2
+            continue
+
+        # '*': parse argc
+        star = i
+        i += 1
+        end = i
+        while end + 1 < n and not (data[end] == 0x0D and data[end + 1] == 0x0A):
+            end += 1
+        if end + 1 >= n:
+            if strict:
+                raise ValueError("Truncated array header at %d" % star)
+            return out
+
+        v = 0
+        neg = False
+        ok = end > i
+        j = i
+        if j < end and data[j] == 0x2D:
+            neg = True
+            j += 1
+            ok = j < end
+        while j < end:
+            c = data[j]
+            if c < 0x30 or c > 0x39:
+                ok = False
+                break
+            v = v * 10 + (c - 0x30)
+            j += 1
+        if not ok:
+            if strict:
+                raise ValueError("Bad array header at %d" % star)
+            # Resync at the next frame-start anchor (quadratic-safe).
+            j = star
+            while j + 1 < n and not (data[j] == 0x0A and data[j + 1] == 0x2A):
+                j += 1
+            i = j + 1 if j + 1 < n else n
+            continue
+        argc = -v if neg else v
+
+        i = end + 2
+        argv = []
+        ok = True
+
+        for k in range(argc):
+            if i >= n or data[i] != 0x24:  # '$'
+                if strict:
+                    raise ValueError("Expected '$' at %d" % i)
+                ok = False
+                break
+
+            i += 1
+            end = i
+            while end + 1 < n and not (data[end] == 0x0D and data[end + 1] == 0x0A):
+                end += 1
+            if end + 1 >= n:
+                if strict:
+                    raise ValueError("Truncated bulk header at %d" % i)
+                return out
+
+            v = 0
+            neg = False
+            j = i
+            if j < end and data[j] == 0x2D:
+                neg = True
+                j += 1
+            if j >= end:
+                if strict:
+                    # empty length field ($\r\n) must not be dropped quietly
+                    raise ValueError("Bad bulk length at %d" % i)
+                ok = False
+                break
+            while j < end:
+                c = data[j]
+                if c < 0x30 or c > 0x39:
+                    ok = False
+                    break
+                v = v * 10 + (c - 0x30)
+                j += 1
+            if not ok:
+                if strict:
+                    raise ValueError("Bad bulk length at %d" % i)
+                break
+            length = -v if neg else v
+
+            i = end + 2
+            if i + length + 2 > n:
+                if strict:
+                    raise ValueError("Truncated bulk payload at %d" % i)
+                return out
+
+            argv.append(bytes(data[i:i + length]))
+            i += length + 2  # data + CRLF
+
+        # strict mode mirrors oldconv, which also yields empty argvs
+        # (e.g. *0); lenient mode keeps dropping them.
+        if ok and (argv or strict):
+            out.append(argv)
+        # else: silently drop malformed command
+
+    return out
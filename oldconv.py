@@ -1,43 +1,72 @@
 #!/usr/bin/env python3
 import sys
+from functools import partial
 from pathlib import Path
 
+# Optional compiled parser (cythonize -i conv_parse.pyx), shared with
+# conv.py. strict=True keeps this module's raise-on-malformed semantics.
+try:
+    from conv_parse import parse_resp as _parse_resp_c
+    _parse_resp_c = partial(_parse_resp_c, strict=True)
+except ImportError:
+    _parse_resp_c = None
+
 def parse_resp(data: bytes):
+    # Indexing bytes gives plain ints, so the per-byte marker checks are
+    # integer compares instead of allocating a fresh 1-byte slice each
+    # probe. Slices are only taken for the int() fields and the args.
     i = 0
     n = len(data)
+    index = data.index
 
     while i < n:
-        if data[i:i+1] != b'*':
+        if data[i] != 0x2A:  # '*'
             raise ValueError(f"Expected '*', got {data[i:i+1]!r} at {i}")
 
         i += 1
-        end = data.index(b'\r\n', i)
+        end = index(b'\r\n', i)
         argc = int(data[i:end])
         i = end + 2
 
         argv = []
+        append = argv.append
         for _ in range(argc):
-            if data[i:i+1] != b'$':
+            if i >= n or data[i] != 0x24:  # '$'
                 raise ValueError(f"Expected '$', got {data[i:i+1]!r} at {i}")
             i += 1
 
-            end = data.index(b'\r\n', i)
+            end = index(b'\r\n', i)
             length = int(data[i:end])
             i = end + 2
 
-            arg = data[i:i+length]
-            argv.append(arg)
+            # A short payload used to slice silently into a truncated
+            # arg; a corrupt corpus should fail loudly instead.
+            if i + length + 2 > n:
+                raise ValueError(f"Truncated bulk payload at {i}")
+
+            append(data[i:i+length])
             i += length + 2  # skip data + CRLF
 
         yield argv
 
 def resp_file_to_inline(resp_path: Path, out_path: Path):
+    parser = _parse_resp_c if _parse_resp_c is not None else parse_resp
     data = resp_path.read_bytes()
 
-    with out_path.open("wb") as out:
-        for argv in parse_resp(data):
-            # Join args with spaces, newline-terminate command
-            out.write(b" ".join(argv) + b"\n")
+    with out_path.open("wb", buffering=1 << 20) as out:
+        # Join args with spaces, newline-terminate each command. Lines
+        # are batched and flushed with one write per 4096 commands
+        # instead of one write call per command.
+        batch = []
+        append = batch.append
+        write = out.write
+        for argv in parser(data):
+            append(b" ".join(argv))
+            if len(batch) >= 4096:
+                write(b"\n".join(batch) + b"\n")
+                batch.clear()
+        if batch:
+            write(b"\n".join(batch) + b"\n")
 
 if __name__ == "__main__":
     if len(sys.argv) != 3: